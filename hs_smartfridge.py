@@ -1,8 +1,12 @@
 import json
-from typing import List, Dict, Optional, Any
+import sys
+from collections import Counter
+from typing import List, Dict, Optional, Any, Tuple
 
 
 class Item:
+    __slots__ = ("_name", "_freshness", "_daily_spoil")
+
     def __init__(self, name: str, freshness: int, daily_spoil: int = 0):
         self._name = name
         self._freshness = freshness
@@ -16,14 +20,11 @@ class Item:
 
     @property
     def non_perishable(self) -> bool:
-        return True if not self._daily_spoil else False
+        return not self._daily_spoil
 
     @property
     def freshness(self) -> int:
-        if self._daily_spoil == 0:
-            return -1
-        else:
-            return self._freshness
+        return -1 if not self._daily_spoil else self._freshness
 
     def spoil(self) -> int:
         """
@@ -31,23 +32,20 @@ class Item:
         """
         if not self._daily_spoil:
             return -1
-        self._freshness = self._freshness - self._daily_spoil if self._freshness > self._daily_spoil else 0
+        self._freshness = max(self._freshness - self._daily_spoil, 0)
         return self._freshness
 
     def as_dict(self) -> Dict[str, any]:
-        _dict = dict(
-            name=self._name
-        )
-        if self.non_perishable:
-            _dict.update(
+        if not self._daily_spoil:
+            return dict(
+                name=self._name,
                 non_perishable=True
             )
-        else:
-            _dict.update(
-                freshness=self._freshness,
-                daily_spoil=self._daily_spoil
-            )
-        return _dict
+        return dict(
+            name=self._name,
+            freshness=self._freshness,
+            daily_spoil=self._daily_spoil
+        )
 
 from enum import Enum
 
@@ -64,22 +62,24 @@ class DailySpoil(Enum):
     apple = 2
     waterbottle = 0
 
+# plain dict lookups of the enum values, used by get_item
+_FRESHNESS: Dict[str, int] = {m.name: m.value for m in Freshness}
+_DAILY_SPOIL: Dict[str, int] = {m.name: m.value for m in DailySpoil}
+
 def get_item(name: str, freshness: Optional[int] = None, daily_spoil: Optional[int] = None) -> Item:
+    # just assume unknown item is non-perishable
     if freshness is None:
-        if name not in Freshness.__members__:
-            # just assume unknown item is non-perishable
-            freshness = 1
-        else:
-            freshness = Freshness[name].value
+        freshness = _FRESHNESS.get(name, 1)
     if daily_spoil is None:
-        if name not in DailySpoil.__members__:
-            # just assume unknown item is non-perishable
-            daily_spoil = 0
-        else:
-            daily_spoil = DailySpoil[name].value
+        daily_spoil = _DAILY_SPOIL.get(name, 0)
     return Item(name, freshness, daily_spoil)
 
 
+def _intern_name(name: str) -> str:
+    # sys.intern rejects str subclasses, leave those names as they are
+    return sys.intern(name) if type(name) is str else name
+
+
 class DailyRunnerable:
     def daily_update(self):
         raise NotImplementedError
@@ -94,6 +94,13 @@ class CronRunner:
     def notify(self, message: str):
         pass
 
+    def notify_batch(self, messages: List[str]):
+        """
+        Override to send all messages at once, notifies them one by one by default
+        """
+        for message in messages:
+            self.notify(message)
+
 cron_runner = CronRunner()
 
 MESSAGE_ITEM_ZERO_STOCK = "Item stock runs out: {item_name}"
@@ -107,93 +114,139 @@ class SmartFridge():
 
     def __init__(self, capacity: int, freshness_threshold: int = 2):
         self._cap = capacity
-        # should use a linkedlist actually
-        self._cabinet: List[Item] = []
-        self._item_counter: Dict[str, int] = {}
+        # one record per batch put in, oldest first; units of a batch share freshness
+        self._stock: Dict[str, List[Tuple[Item, int]]] = {}
+        self._item_counter: Counter[str] = Counter()
+        self._total = 0
+        # sorted item names for display, reset whenever a name is added or removed
+        self._sorted_names: Optional[Tuple[str, ...]] = None
         self._freshness_threshold = freshness_threshold
 
     def put(self, item_name: str, item_quantity: int):
-        if item_quantity > self._cap - len(self._cabinet):
+        if item_quantity > self._cap - self._total:
             raise RuntimeError(f"Fridge free capacity is less than: {item_quantity}")
-        self._cabinet.extend([get_item(item_name)] * item_quantity)
-        self._item_counter[item_name] = self._item_counter.get(item_name, 0) + item_quantity
+        item_name = _intern_name(item_name)
+        batches = self._stock.setdefault(item_name, [])
+        if item_quantity:
+            item = get_item(item_name)
+            if batches and batches[-1][0]._freshness == item._freshness:
+                # latest batch has not spoiled yet, merge into it
+                latest, latest_count = batches[-1]
+                batches[-1] = (latest, latest_count + item_quantity)
+            else:
+                batches.append((item, item_quantity))
+        if item_name not in self._item_counter:
+            self._sorted_names = None
+        self._item_counter[item_name] += item_quantity
+        self._total += item_quantity
 
     def exit(self, item_name: str, item_quantity: int):
-        if item_name not in self._item_counter:
+        item_name = _intern_name(item_name)
+        item_count = self._item_counter.get(item_name)
+        if item_count is None:
             raise KeyError(f"Item not found in fridge: {item_name}")
-        if item_quantity > self._item_counter[item_name]:
+        if item_quantity > item_count:
             raise ValueError(f"Item insufficient to exit: {item_name} of count {item_quantity}")
-        item_exited = 0
-        idx = 0
-        _new_cab: List[Item] = []
-        while idx < len(self._cabinet) and item_exited < item_quantity:
-            if self._cabinet[idx].name != item_name:
-                _new_cab.append(self._cabinet[idx])
-            else:
-                item_exited += 1
-            idx += 1
-        if idx < len(self._cabinet) - 1:
-            _new_cab.extend(self._cabinet[idx:])
-        self._cabinet = _new_cab
-        self._item_counter[item_name] = self._item_counter[item_name] - item_quantity
-        if self._item_counter[item_name] == 0:
+        # units exit from the oldest batch first
+        batches = self._stock[item_name]
+        to_exit = item_quantity
+        while to_exit:
+            item, batch_count = batches[0]
+            if batch_count > to_exit:
+                batches[0] = (item, batch_count - to_exit)
+                break
+            batches.pop(0)
+            to_exit -= batch_count
+        item_count -= item_quantity
+        self._item_counter[item_name] = item_count
+        self._total -= item_quantity
+        if item_count == 0:
             cron_runner.notify(MESSAGE_ITEM_ZERO_STOCK.format(item_name=item_name))
 
     def daily_update(self):
-        for item_name, item_count in self._item_counter.items():
-            if item_count == 0:
-                cron_runner.notify(MESSAGE_ITEM_ZERO_STOCK.format(item_name=item_name))
-                # remove the item
-                self._item_counter.pop(item_name)
-        spoil_item: Dict[str, int] = {}
-        for item in self._cabinet:
-            if item.non_perishable:
-                continue
-            freshness = item.spoil()
-            if freshness <= self._freshness_threshold:
-                spoil_item[item.name] += spoil_item.get(item.name, 0) + 1
-        for _item, _item_count in spoil_item:
-            cron_runner.notify(MESSAGE_ITEM_SPOILED.format(
-                item_name=_item.name,
+        events: List[str] = []
+        out_of_stock = [
+            item_name
+            for item_name, item_count in self._item_counter.items()
+            if item_count == 0
+        ]
+        for item_name in out_of_stock:
+            events.append(MESSAGE_ITEM_ZERO_STOCK.format(item_name=item_name))
+            # remove the item
+            self._item_counter.pop(item_name)
+            self._stock.pop(item_name)
+        if out_of_stock:
+            self._sorted_names = None
+        for _item, _item_count in self._spoil().items():
+            events.append(MESSAGE_ITEM_SPOILED.format(
+                item_name=_item,
                 item_count=_item_count
             ))
+        if events:
+            cron_runner.notify_batch(events)
+
+    def _spoil(self) -> Dict[str, int]:
+        """
+        Spoils every perishable batch by one day, returns the count of each spoiled item
+        """
+        threshold = self._freshness_threshold
+        spoil_item: Dict[str, int] = {}
+        for item_name, batches in self._stock.items():
+            spoiled = 0
+            for item, batch_count in batches:
+                # read the Item fields directly, skipping the property calls
+                if not item._daily_spoil:
+                    continue
+                if item.spoil() <= threshold:
+                    spoiled += batch_count
+            if spoiled:
+                spoil_item[item_name] = spoiled
+        return spoil_item
+
+    def _sorted_item_names(self) -> Tuple[str, ...]:
+        if self._sorted_names is None:
+            self._sorted_names = tuple(sorted(self._item_counter.keys()))
+        return self._sorted_names
 
     def display(self, show_freshness: bool = False, redirect: bool = False) -> Optional[str]:
-        display = ""
+        parts: List[str] = []
         if not self._item_counter:
-            display = "Empty fridge: No item found"
+            parts.append("Empty fridge: No item found")
         elif not show_freshness:
-            display = "Item(s) in fridge:\n"
-            for item_name in sorted(self._item_counter.keys()):
-                display += SmartFridge.DISPLAY_TEMPLATE_ITEM.format(
+            parts.append("Item(s) in fridge:")
+            item_counter = self._item_counter
+            tmpl = SmartFridge.DISPLAY_TEMPLATE_ITEM.format
+            for item_name in self._sorted_item_names():
+                parts.append(tmpl(
                     item_name=item_name,
-                    item_count=self._item_counter[item_name]
-                )
-                display += "\n"
+                    item_count=item_counter[item_name]
+                ))
         else:
-            display = "Item(s) in fridge with freshness:\n"
-            for item_name in sorted(self._item_counter.keys()):
-                for item in self._cabinet:
-                    if item.name != item_name:
-                        continue
-                    if item.non_perishable:
-                        # only display non-perishable once
-                        display += SmartFridge.DISPLAY_TEMPLATE_ITEM_NONPERISH.format(
-                            item_name=item.name,
-                            item_count=self._item_counter[item.name]
-                        )
-                        display += "\n"
-                        break
-                    else:
-                        display += SmartFridge.DISPLAY_TEMPLATE_ITEM_PERISHABLE.format(
-                            item_name=item.name,
-                            freshness=item.freshness
-                        )
-                        display += "\n"
-        display += SmartFridge.DISPLAY_TEMPLATE_ITEM_TOTAL.format(
-            total_count=len(self._cabinet)
-        )
-        display += "\n"
+            parts.append("Item(s) in fridge with freshness:")
+            item_counter = self._item_counter
+            tmpl_nonperish = SmartFridge.DISPLAY_TEMPLATE_ITEM_NONPERISH.format
+            tmpl_perishable = SmartFridge.DISPLAY_TEMPLATE_ITEM_PERISHABLE.format
+            for item_name in self._sorted_item_names():
+                item_count = item_counter[item_name]
+                if not item_count:
+                    continue
+                batches = self._stock[item_name]
+                # direct field reads, as in _spoil()
+                if not batches[0][0]._daily_spoil:
+                    parts.append(tmpl_nonperish(
+                        item_name=item_name,
+                        item_count=item_count
+                    ))
+                    continue
+                for item, _ in batches:
+                    parts.append(tmpl_perishable(
+                        item_name=item_name,
+                        freshness=item._freshness
+                    ))
+        parts.append(SmartFridge.DISPLAY_TEMPLATE_ITEM_TOTAL.format(
+            total_count=self._total
+        ))
+        display = "\n".join(parts) + "\n"
         if not redirect:
             print(display, end="")
             return
@@ -204,11 +257,12 @@ class SmartFridge():
         if not self._item_counter:
             return {}
         json_obj = {
-            item_name: []
-            for item_name in self._item_counter.keys()
+            item_name: [
+                dict(item.as_dict(), count=batch_count)
+                for item, batch_count in batches
+            ]
+            for item_name, batches in self._stock.items()
         }
-        for item in self._cabinet:
-            json_obj[item.name].append(item.as_dict())
         return json_obj
 
 def test_fridge():
@@ -226,7 +280,10 @@ def test_fridge():
     fridge.put("chicken", 1)
     fridge.put("apple", 3)
     disp = fridge.display(redirect=False)
-    disp = fridge.display(show_freshness=True)
+    disp = fridge.display(show_freshness=True, redirect=True)
+    # one line per batch, not per unit
+    assert disp.count("apple, freshness at 14") == 1
+    assert "waterbottle, non-perishable, 1 Count" in disp
     print(json.dumps(fridge.as_dict(), indent=2))
     disp = fridge.display(redirect=True)
     assert "chicken, 1 Count" in disp
@@ -247,4 +304,115 @@ def test_fridge():
     disp = fridge.display(redirect=True)
     assert "apple, 7 Count" in disp
 
+class _RecordingCronRunner(CronRunner):
+    def __init__(self):
+        self.messages: List[str] = []
+        self.batches: List[List[str]] = []
+
+    def notify(self, message: str):
+        self.messages.append(message)
+
+    def notify_batch(self, messages: List[str]):
+        self.batches.append(list(messages))
+        super().notify_batch(messages)
+
+def test_daily_update():
+    global cron_runner
+    default_runner = cron_runner
+    cron_runner = runner = _RecordingCronRunner()
+    try:
+        fridge = SmartFridge(20)
+        fridge.put("chicken", 2)
+        fridge.put("apple", 3)
+        fridge.put("waterbottle", 1)
+        fridge.daily_update()
+        assert not runner.messages
+        assert not runner.batches
+        fridge.daily_update()
+        disp = fridge.display(show_freshness=True, redirect=True)
+        assert "chicken, freshness at 3" in disp
+        assert "apple, freshness at 10" in disp
+        assert "waterbottle, non-perishable, 1 Count" in disp
+        fridge.daily_update()
+        assert runner.messages == [MESSAGE_ITEM_SPOILED.format(item_name="chicken", item_count=2)]
+        fridge.put("chicken", 1)
+        fridge.daily_update()
+        fridge.daily_update()
+        fridge.exit("apple", 3)
+        fridge.exit("waterbottle", 1)
+        runner.messages.clear()
+        runner.batches.clear()
+        fridge.daily_update()
+        # zero stock and spoiled messages go out together in one batch
+        assert runner.batches == [[
+            MESSAGE_ITEM_ZERO_STOCK.format(item_name="apple"),
+            MESSAGE_ITEM_ZERO_STOCK.format(item_name="waterbottle"),
+            MESSAGE_ITEM_SPOILED.format(item_name="chicken", item_count=3),
+        ]]
+        assert runner.messages == runner.batches[0]
+        disp = fridge.display(redirect=True)
+        assert "apple" not in disp
+        assert "waterbottle" not in disp
+        assert "chicken, 3 Count" in disp
+    finally:
+        cron_runner = default_runner
+
+def test_restock():
+    global cron_runner
+    default_runner = cron_runner
+    cron_runner = runner = _RecordingCronRunner()
+    try:
+        fridge = SmartFridge(20)
+        fridge.put("chicken", 1)
+        fridge.put("chicken", 2)
+        fridge.daily_update()
+        fridge.daily_update()
+        fridge.put("chicken", 5)
+        disp = fridge.display(show_freshness=True, redirect=True)
+        assert disp.count("chicken, freshness at 3") == 1
+        assert disp.count("chicken, freshness at 9") == 1
+        assert "Total item count: 8" in disp
+        fridge.daily_update()
+        assert runner.messages == [MESSAGE_ITEM_SPOILED.format(item_name="chicken", item_count=3)]
+        # the spoiled batch exits first
+        fridge.exit("chicken", 4)
+        disp = fridge.display(show_freshness=True, redirect=True)
+        assert "chicken, freshness at 0" not in disp
+        assert "chicken, freshness at 6" in disp
+        assert fridge.as_dict()["chicken"] == [
+            dict(name="chicken", freshness=6, daily_spoil=3, count=4)
+        ]
+    finally:
+        cron_runner = default_runner
+
+def test_put_nothing():
+    fridge = SmartFridge(20)
+    fridge.put("apple", 3)
+    fridge.daily_update()
+    fridge.put("apple", 0)
+    disp = fridge.display(show_freshness=True, redirect=True)
+    assert disp.count("apple, freshness at") == 1
+    assert fridge.as_dict()["apple"] == [
+        dict(name="apple", freshness=12, daily_spoil=2, count=3)
+    ]
+    fridge.put("chicken", 0)
+    disp = fridge.display(redirect=True)
+    assert "chicken, 0 Count" in disp
+    assert fridge.as_dict()["chicken"] == []
+
+def test_str_subclass_name():
+    class Name(str):
+        pass
+
+    fridge = SmartFridge(20)
+    fridge.put(Name("apple"), 3)
+    fridge.put("apple", 1)
+    fridge.exit(Name("apple"), 2)
+    disp = fridge.display(redirect=True)
+    assert "apple, 2 Count" in disp
+
 test_fridge()
+test_daily_update()
+test_restock()
+test_put_nothing()
+test_str_subclass_name()